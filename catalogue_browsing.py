@@ -1,79 +1,322 @@
+import collections
+import contextlib
+import functools
+import hashlib
+import hmac
+import itertools
 import json
+import math
 import os
 import getpass
-import re
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # optional speed-up, the standard json module is used without it
+    orjson = None
+
+try:
+    import termios
+except ImportError:  # not available on Windows, where getpass is always used
+    termios = None
+
 CATALOGUE_FILE = "catalogue.json"
 USERS_FILE = "users.json"
 CART_FILE = "cart.json"
-
+CATALOGUE_LOG = "catalogue.log"
+USERS_LOG = "users.log"
+CART_LOG = "cart.log"
+PAGE_SIZE = 20  # products listed at a time when browsing
+FILTER_CACHE_SIZE = 64  # most recent filter results kept by ProductCatalogue
+CATALOGUE_LOG_LIMIT = 200  # journal records before the catalogue is saved in full
+CATALOGUE_FIELDS = ["upc", "name", "description", "price", "category", "stock"]  # order of Product.as_row()
+MAX_STOCK = 2 ** 63 - 1  # largest integer orjson can write
+CARD_SEPARATORS = str.maketrans("", "", "- ")  # deleted from entered card numbers
+SAMPLE_PRODUCTS = [
+    {"upc": "000000001111", "name": "Laptop X1", "description": "High performance laptop", "price": 1299.99,
+     "category": "Computers", "stock": 5},
+    {"upc": "000000002222", "name": 'Smart TV 55"', "description": "4K UHD Smart TV", "price": 899.99,
+     "category": "TVs", "stock": 0},
+    {"upc": "000000003333", "name": "Bluetooth Speaker", "description": "Portable speaker", "price": 79.99,
+     "category": "Audio", "stock": 10},
+]
+
+_output = []  # lines waiting to be written by flush_output()
+
+def emit(line=""):
+    _output.append(line)
+    _output.append("\n")
+
+def flush_output():
+    sys.stdout.write("".join(_output))
+    sys.stdout.flush()
+    _output.clear()
+
+def prompt(text):
+    if sys.stdin.isatty():
+        flush_output()
+        return input(text)  # keeps line editing for interactive use
+    _output.append(text)  # piped input: one write for the prompt and any queued output
+    flush_output()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip("\n")
+
+def json_dumps(obj):
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            pass  # values orjson can't encode are left to the standard json module
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def atomic_write(path, data):
+    # Readers see either the old file or the new one, never a partial write
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def is_digits(value, length=None):
+    # str.isdigit alone also accepts characters such as "²" that int() rejects
+    return value.isascii() and value.isdigit() and (length is None or len(value) == length)
+
+# Append-only log of the changes made since a data file was last saved in full
+class Journal:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.count = 0  # records currently in the file
+
+    def append(self, record):
+        if self.file is None:
+            self.file = open(self.path, "ab", buffering=8192)
+        self.file.write(json_dumps(record) + b"\n")
+        self.file.flush()
+        self.count += 1
+
+    def replay(self, apply):
+        if not os.path.exists(self.path):
+            return
+        count = 0
+        good = 0  # byte offset just past the last record that was applied
+        with open(self.path, "r+b") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partially written last record
+                try:
+                    apply(json_loads(line))
+                # ValueError also covers JSONDecodeError, and UnicodeDecodeError from the stdlib json on bytes
+                except (KeyError, TypeError, ValueError):
+                    print(f"{self.path} is damaged at record {count + 1}; it and any later changes were discarded.")
+                    break
+                count += 1
+                good += len(line)
+            # Drop the unusable tail so the next append starts on a fresh line
+            f.truncate(good)
+        self.count = count
+
+    def clear(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.count = 0
+
+@dataclass(slots=True, eq=False)
 class Product:
-    def __init__(self, upc, name, description, price, category, stock):
-        self.upc = upc
-        self.name = name
-        self.description = description
-        self.price = price
-        self.category = category
-        self.stock = stock  # integer for quantity in stock
+    upc: str
+    name: str
+    description: str
+    price: float
+    category: str
+    stock: int  # integer for quantity in stock
+    _name_cf: str = field(init=False, repr=False)
+    _category_cf: str = field(init=False, repr=False)
+    _price_str: str = field(init=False, repr=False)
+    _stock_str: str = field(init=False, repr=False)
+    _DISPLAY_FORMAT = ("UPC: {0.upc}\nName: {0.name}\nDescription: {0.description}\nPrice: {0._price_str}\n"
+                       "Category: {0.category}\nAvailability: {0._stock_str}")
+
+    def __post_init__(self):
+        # Categories are a small closed set, so every product shares the same interned strings
+        self.category = sys.intern(self.category)
+        self._name_cf = self.name.casefold()
+        self._category_cf = sys.intern(self.category.casefold())
+        self._price_str = f"${self.price:.2f}"
+        self.set_stock(self.stock)
+
+    def set_stock(self, stock):
+        self.stock = stock
+        self._stock_str = "In Stock" if stock > 0 else "Out of Stock"
+
+    def as_row(self):
+        return [self.upc, self.name, self.description, self.price, self.category, self.stock]
+
+    def to_dict(self):
+        return {"upc": self.upc, "name": self.name, "description": self.description,
+                "price": self.price, "category": self.category, "stock": self.stock}
 
     def display(self):
-        print(f"UPC: {self.upc}")
-        print(f"Name: {self.name}")
-        print(f"Description: {self.description}")
-        print(f"Price: ${self.price:.2f}")
-        print(f"Category: {self.category}")
-        print(f"Availability: {'In Stock' if self.stock > 0 else 'Out of Stock'}")
+        emit(self._DISPLAY_FORMAT.format(self))
+        flush_output()
 
 class ProductCatalogue:
     def __init__(self):
-        self.products = []
+        self.products = {}  # key: product upc, value: Product
+        self._by_category = {}  # key: casefolded category, value: list of Products
+        self._version = 0  # bumped whenever products are added or removed
+        self._filter_cache = collections.OrderedDict()  # key: (filter, argument), value: (version, products)
+        self._needs_save = False  # set when catalogue.json couldn't be used as loaded
+        self.journal = Journal(CATALOGUE_LOG)
+        self._batching = False  # set inside batch(), where full saves wait until the end
 
     def add_product(self, product):
-        self.products.append(product)
+        if product.upc in self.products:
+            self.remove_product_by_upc(product.upc)
+        self._version += 1
+        self.products[product.upc] = product
+        self._by_category.setdefault(product._category_cf, []).append(product)
+
+    def _rebuild_indexes(self):
+        self._version += 1
+        self._by_category = {}
+        for p in self.products.values():
+            self._by_category.setdefault(p._category_cf, []).append(p)
 
     def save(self):
-        with open(CATALOGUE_FILE, "w") as f:
-            json.dump([p.__dict__ for p in self.products], f)
+        atomic_write(CATALOGUE_FILE, json_dumps({"fields": CATALOGUE_FIELDS,
+                                                 "rows": [p.as_row() for p in self.products.values()]}))
+        self.journal.clear()
+        self._needs_save = False
+
+    def save_if_changed(self):
+        if self._needs_save or self.journal.count:
+            self.save()
 
     def load(self):
         if not os.path.exists(CATALOGUE_FILE):
             print("Catalogue file missing, loading sample data.")
-            self.products = self.create_sample_catalogue().products
-            self.save()
+            self.products = self.create_sample_products()
+            self._needs_save = True  # saving now would clear the journal before it is replayed
         else:
             try:
-                with open(CATALOGUE_FILE, "r") as f:
-                    product_dicts = json.load(f)
-                    if not product_dicts:
+                with open(CATALOGUE_FILE, "rb") as f:
+                    data = json_loads(f.read())
+                    if isinstance(data, dict):
+                        fields, rows = data["fields"], data["rows"]
+                    else:
+                        fields, rows = CATALOGUE_FIELDS, data  # saved before the fields header was added
+                    if not rows:
                         raise ValueError("Empty catalogue file.")
-                    self.products = [Product(**pd) for pd in product_dicts]
-            except (json.JSONDecodeError, KeyError, ValueError):
+                    if isinstance(rows[0], dict):
+                        products = (Product(**pd) for pd in rows)  # saved before rows were positional
+                    elif fields == CATALOGUE_FIELDS:
+                        products = (Product(*row) for row in rows)
+                    else:
+                        products = (Product(**dict(zip(fields, row))) for row in rows)
+                    self.products = {p.upc: p for p in products}
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
                 print("Catalogue data corrupted or empty. Loading sample data.")
-                self.products = self.create_sample_catalogue().products
+                self.products = self.create_sample_products()
+                self._needs_save = True
+        self._rebuild_indexes()
+        self.journal.replay(self._apply)
+
+    def _apply(self, record):
+        if record["op"] == "add":
+            self.add_product(Product(**record["product"]))
+        elif record["op"] == "stock":
+            product = self.find_product_by_upc(record["upc"])
+            if product:
+                product.set_stock(record["stock"])
+        elif record["op"] == "checkout":
+            for upc, stock in record["stock"].items():
+                product = self.find_product_by_upc(upc)
+                if product:
+                    product.set_stock(stock)
+        elif record["op"] == "remove":
+            self.remove_product_by_upc(record["upc"])
+
+    def _record(self, record):
+        self.journal.append(record)
+        if self.journal.count >= CATALOGUE_LOG_LIMIT and not self._batching:
+            self.save()
+
+    @contextlib.contextmanager
+    def batch(self):
+        # Edits are still journaled one by one, but the catalogue is rewritten at most once
+        self._batching = True
+        try:
+            yield
+        finally:
+            self._batching = False
+            if self.journal.count >= CATALOGUE_LOG_LIMIT:
                 self.save()
 
+    def record_add(self, product):
+        self._record({"op": "add", "product": product.to_dict()})
+
+    def record_stock(self, product):
+        self._record({"op": "stock", "upc": product.upc, "stock": product.stock})
+
+    def record_checkout(self, products):
+        self._record({"op": "checkout", "stock": {p.upc: p.stock for p in products}})
+
+    def record_remove(self, upc):
+        self._record({"op": "remove", "upc": upc})
+
+    def _cached(self, key, compute):
+        # Results stay valid until a product is added or removed; stock is read live
+        hit = self._filter_cache.get(key)
+        if hit is not None and hit[0] == self._version:
+            self._filter_cache.move_to_end(key)
+            return hit[1]
+        result = compute()
+        self._filter_cache[key] = (self._version, result)
+        self._filter_cache.move_to_end(key)
+        if len(self._filter_cache) > FILTER_CACHE_SIZE:
+            self._filter_cache.popitem(last=False)
+        return result
+
     def filter_by_category(self, category):
-        return [p for p in self.products if p.category.lower() == category.lower()]
+        category = category.casefold()
+        return self._cached(("category", category), lambda: list(self._by_category.get(category, [])))
 
     def filter_by_price(self, ascending=True):
-        return sorted(self.products, key=lambda x: x.price, reverse=not ascending)
+        return self._cached(("price", ascending),
+                            lambda: sorted(self.products.values(), key=lambda x: x.price, reverse=not ascending))
 
     def search_by_name(self, search_name):
-        return [p for p in self.products if search_name.lower() in p.name.lower()]
+        search_name = search_name.casefold()
+        return self._cached(("name", search_name),
+                            lambda: [p for p in self.products.values() if search_name in p._name_cf])
+
+    def __contains__(self, upc):
+        return upc in self.products
 
     def find_product_by_upc(self, upc):
-        return next((p for p in self.products if p.upc == upc), None)
+        return self.products.get(upc)
 
     def remove_product_by_upc(self, upc):
-        self.products = [p for p in self.products if p.upc != upc]
+        self._version += 1
+        product = self.products.pop(upc, None)
+        if product:
+            self._by_category[product._category_cf].remove(product)
 
-    def create_sample_catalogue(self):
-        catalogue = ProductCatalogue()
-        catalogue.add_product(Product("000000001111", "Laptop X1", "High performance laptop", 1299.99, "Computers", 5))
-        catalogue.add_product(Product("000000002222", 'Smart TV 55"', "4K UHD Smart TV", 899.99, "TVs", 0))
-        catalogue.add_product(Product("000000003333", "Bluetooth Speaker", "Portable speaker", 79.99, "Audio", 10))
-        return catalogue
+    def create_sample_products(self):
+        return {pd["upc"]: Product(**pd) for pd in SAMPLE_PRODUCTS}
 
 class CheckoutHandler:
     @staticmethod
@@ -81,60 +324,70 @@ class CheckoutHandler:
         if not cart.items:
             print("Cart is empty.")
             return False
-        # Check stock availability
+        # Look up every cart line once, checking stock and adding up the total cost
+        lines = []
+        total_price = 0.0
         for upc, qty in cart.items.items():
             product = catalogue.find_product_by_upc(upc)
-            if product:
-                if product.stock < qty:
-                    print(f"Not enough stock for {product.name}. Checkout aborted.")
-                    return False
-        # Get total cost
-        total_price = cart.get_total_price(catalogue)
+            if not product:
+                continue  # no longer in the catalogue, as in view_cart
+            if product.stock < qty:
+                print(f"Not enough stock for {product.name}. Checkout aborted.")
+                return False
+            lines.append((product, qty))
+            total_price += product.price * qty
+        if not lines:
+            print("None of the products in your cart are available any more. Checkout aborted.")
+            return False
+        total_price = round(total_price, 2)
         print(f"Total price of items in cart: ${total_price:.2f}")
 
         # Payment inputs and validation
-        card_number = input("Enter credit card number: ").replace("-", "").replace(" ", "")
-        card_number = re.findall(r"[0-9]+", card_number)
-        if not card_number or len(card_number[0]) != 16:
+        card_number = prompt("Enter credit card number: ").translate(CARD_SEPARATORS)
+        if not is_digits(card_number, 16):
             print("The entered card number should be exactly 16 digits long. Checkout aborted.")
             return False
 
-        expiry_date_month = input("Enter month of card expiry date (1-12): ").strip()
-        if not expiry_date_month.isdigit() or not (1 <= int(expiry_date_month) <= 12):
+        expiry_date_month = prompt("Enter month of card expiry date (1-12): ").strip()
+        if not is_digits(expiry_date_month) or not (1 <= int(expiry_date_month) <= 12):
             print("The entered expiry date month should be a whole number between 1 and 12. Checkout aborted.")
             return False
         expiry_date_month = int(expiry_date_month)
 
-        expiry_date_year = input("Enter year of card expiry date (YYYY): ").strip()
-        if not expiry_date_year.isdigit():
+        expiry_date_year = prompt("Enter year of card expiry date (YYYY): ").strip()
+        if not is_digits(expiry_date_year):
             print("The entered expiry date year should be a whole number. Checkout aborted.")
             return False
         expiry_date_year = int(expiry_date_year)
 
         # Check card expiration
-        current_year = datetime.now().year
-        current_month = datetime.now().month
-        if expiry_date_year < current_year or (expiry_date_year == current_year and expiry_date_month < current_month):
+        now = datetime.now()
+        current_year, current_month = now.year, now.month
+        if (expiry_date_year, expiry_date_month) < (current_year, current_month):
             print(f"This card has already expired ({expiry_date_month}/{expiry_date_year}). Checkout aborted.")
             return False
 
-        security_number = input("Enter security number of credit card (3 digits on back): ").strip()
-        if not (security_number.isdigit() and len(security_number) == 3):
+        security_number = prompt("Enter security number of credit card (3 digits on back): ").strip()
+        if not is_digits(security_number, 3):
             print("The entered security number should be exactly 3 digits long. Checkout aborted.")
             return False
 
         # Proceed with checkout: reduce stock, clear cart
-        for upc, qty in cart.items.items():
-            product = catalogue.find_product_by_upc(upc)
-            product.stock -= qty
-        cart.items.clear()
+        for product, qty in lines:
+            product.set_stock(product.stock - qty)
+        catalogue.record_checkout([product for product, _ in lines])
+        cart.clear()
 
         print("Checkout successful! Thank you for your purchase.")
         return True
 
 class Cart:
+    __slots__ = ("items", "_order", "journal")
+
     def __init__(self):
         self.items = {}  # key: product upc, value: quantity
+        self._order = []  # upcs in the order they were added, for numbered menus
+        self.journal = Journal(CART_LOG)
 
     def add_to_cart(self, product, quantity=1):
         if product.stock < quantity:
@@ -148,11 +401,15 @@ class Cart:
             self.items[product.upc] = new_quantity
         else:
             self.items[product.upc] = quantity
+            self._order.append(product.upc)
+        self.journal.append({"op": "set", "upc": product.upc, "qty": self.items[product.upc]})
         print(f"Added {quantity} x {product.name} to cart.")
 
     def remove_from_cart(self, product_upc):
         if product_upc in self.items:
             del self.items[product_upc]
+            self._order.remove(product_upc)
+            self.journal.append({"op": "remove", "upc": product_upc})
             print("Product removed from cart.")
         else:
             print("Product not found in cart.")
@@ -168,67 +425,139 @@ class Cart:
         if quantity > product.stock:
             print(f"Only {product.stock} units available. Cannot update to {quantity}.")
             return
+        if product_upc not in self.items:
+            self._order.append(product_upc)
         self.items[product_upc] = quantity
+        self.journal.append({"op": "set", "upc": product_upc, "qty": quantity})
         print(f"Updated {product.name} quantity to {quantity}.")
 
+    def upc_at(self, index):
+        return self._order[index]
+
+    def clear(self):
+        self.items.clear()
+        self._order.clear()
+        self.journal.append({"op": "clear"})
+
     def view_cart(self, catalogue):
         if not self.items:
             print("Cart is empty.")
             return
-        print("\n--- Your Cart ---")
-        total = 0
+        emit("\n--- Your Cart ---")
         for idx, (upc, qty) in enumerate(self.items.items(), start=1):
             product = catalogue.find_product_by_upc(upc)
             if product:
-                subtotal = product.price * qty
-                total += subtotal
-                print(f"{idx}. {product.name} - ${product.price:.2f} x {qty} = ${subtotal:.2f}")
-        print(f"Total: ${total:.2f}")
+                emit(f"{idx}. {product.name} - {product._price_str} x {qty} = ${product.price * qty:.2f}")
+        emit(f"Total: ${self.get_total_price(catalogue):.2f}")
+        flush_output()
 
     def get_total_price(self, catalogue):
-        total_price = 0.0
-        for upc, qty in self.items.items():
-            product = catalogue.find_product_by_upc(upc)
-            total_price += product.price * qty
-        return round(total_price, 2)
+        products = catalogue.products
+        return round(sum(products[upc].price * qty for upc, qty in self.items.items() if upc in products), 2)
 
     def save(self):
-        with open(CART_FILE, "w") as f:
-            json.dump(self.items, f)
+        atomic_write(CART_FILE, json_dumps(self.items))
+        self.journal.clear()
+
+    def save_if_changed(self):
+        if self.journal.count:
+            self.save()
 
     def load(self):
         if os.path.exists(CART_FILE):
             try:
-                with open(CART_FILE, "r") as f:
-                    self.items = json.load(f)
-            except json.JSONDecodeError:
+                with open(CART_FILE, "rb") as f:
+                    self.items = json_loads(f.read())
+            except ValueError:
                 self.items = {}
+        self.journal.replay(self._apply)
+        self._order = list(self.items)
+
+    def _apply(self, record):
+        if record["op"] == "set":
+            self.items[record["upc"]] = record["qty"]
+        elif record["op"] == "remove":
+            self.items.pop(record["upc"], None)
+        elif record["op"] == "clear":
+            self.items.clear()
+
+def hash_password(password, salt=None):
+    if salt is None:
+        salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=16384, r=8, p=1)
+    return {"salt": salt.hex(), "hash": digest.hex()}
+
+_tty = None  # /dev/tty, kept open across password prompts; False if it can't be used
+
+def read_password(prompt):
+    global _tty
+    if _tty is None:
+        try:
+            _tty = open("/dev/tty", "r+b", buffering=0) if termios else False
+        except OSError:
+            _tty = False
+    if not _tty:
+        return getpass.getpass(prompt)
+    sys.stdout.flush()
+    old = termios.tcgetattr(_tty)
+    new = old[:]
+    new[3] &= ~termios.ECHO
+    termios.tcsetattr(_tty, termios.TCSAFLUSH, new)
+    try:
+        _tty.write(prompt.encode())
+        line = _tty.readline()
+    finally:
+        termios.tcsetattr(_tty, termios.TCSAFLUSH, old)
+        _tty.write(b"\n")
+    if not line:
+        raise EOFError
+    return line.rstrip(b"\r\n").decode()
+
+@functools.lru_cache(maxsize=1)
+def _read_users_file(mtime_ns):
+    # mtime_ns only keys the cache, so an unchanged file is parsed once
+    try:
+        with open(USERS_FILE, "rb") as f:
+            return json_loads(f.read())
+    except ValueError:
+        return {}
 
 class SessionHandler:
     def __init__(self):
+        self.users_journal = Journal(USERS_LOG)
         self.users = self.load_users()
-        self.catalogue = ProductCatalogue()
-        self.catalogue.load()
+        self._catalogue = None
         self.cart = Cart()
         self.cart.load()
 
+    @property
+    def catalogue(self):
+        # Parsed on first use, so logging in or signing up never waits on it
+        if self._catalogue is None:
+            self._catalogue = ProductCatalogue()
+            self._catalogue.load()
+        return self._catalogue
+
     def save_users(self):
-        with open(USERS_FILE, "w") as f:
-            json.dump(self.users, f)
+        atomic_write(USERS_FILE, json_dumps(self.users))
+        self.users_journal.clear()
 
     def load_users(self):
-        if not os.path.exists(USERS_FILE):
-            return {}
-        try:
-            with open(USERS_FILE, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
+        users = {}
+        if os.path.exists(USERS_FILE):
+            users = dict(_read_users_file(os.stat(USERS_FILE).st_mtime_ns))
+
+        def apply(record):
+            if record["op"] == "add":
+                users[record["username"]] = record["password"]
+
+        self.users_journal.replay(apply)
+        return users
 
     def signup(self):
         print("\n--- Signup ---")
         while True:
-            username = input("Enter a new username: ").strip()
+            username = prompt("Enter a new username: ").strip()
             if username in self.users:
                 print("Username already exists. Try another.")
             elif not username:
@@ -236,24 +565,39 @@ class SessionHandler:
             else:
                 break
         while True:
-            password = getpass.getpass("Enter a password: ")
-            password_confirm = getpass.getpass("Confirm password: ")
+            password = read_password("Enter a password: ")
+            password_confirm = read_password("Confirm password: ")
             if password != password_confirm:
                 print("Passwords do not match. Try again.")
             elif not password:
                 print("Password cannot be empty.")
             else:
                 break
-        self.users[username] = password
-        self.save_users()
+        self.set_password(username, password)
         print("Signup successful! Please login now.")
 
+    def set_password(self, username, password):
+        self.users[username] = hash_password(password)
+        self.users_journal.append({"op": "add", "username": username, "password": self.users[username]})
+
+    def check_password(self, username, password):
+        stored = self.users.get(username)
+        if stored is None:
+            return False
+        if isinstance(stored, str):
+            # Account saved before passwords were hashed
+            return hmac.compare_digest(stored.encode(), password.encode())
+        computed = hash_password(password, bytes.fromhex(stored["salt"]))
+        return hmac.compare_digest(stored["hash"], computed["hash"])
+
     def login(self):
         print("\n--- Login ---")
         for _ in range(3):
-            username = input("Username: ").strip()
-            password = getpass.getpass("Password: ")
-            if self.users.get(username) == password:
+            username = prompt("Username: ").strip()
+            password = read_password("Password: ")
+            if self.check_password(username, password):
+                if isinstance(self.users[username], str):
+                    self.set_password(username, password)
                 print(f"Welcome back, {username}!")
                 return username
             else:
@@ -261,13 +605,14 @@ class SessionHandler:
         print("Too many failed attempts. Exiting.")
         return None
 
-    def display_products(self, products):
+    def display_products(self, products, start=1):
         if not products:
             print("No products to display.")
             return
-        for idx, p in enumerate(products, start=1):
-            print(
-                f"{idx}. {p.name} - ${p.price:.2f} ({p.category}) [UPC: {p.upc}] - {'In Stock' if p.stock > 0 else 'Out of Stock'}")
+        for idx, p in enumerate(products, start=start):
+            emit(
+                f"{idx}. {p.name} - {p._price_str} ({p.category}) [UPC: {p.upc}] - {p._stock_str}")
+        flush_output()
 
     def add_product_to_cart_menu(self, product):
         product.display()
@@ -276,11 +621,11 @@ class SessionHandler:
             return
 
         while True:
-            choice = input("Add this product to cart? (y/n): ").strip().lower()
+            choice = prompt("Add this product to cart? (y/n): ").strip().lower()
             if choice == "y":
                 while True:
-                    qty_str = input(f"Enter quantity to add (available: {product.stock}): ").strip()
-                    if not qty_str.isdigit() or int(qty_str) < 1:
+                    qty_str = prompt(f"Enter quantity to add (available: {product.stock}): ").strip()
+                    if not is_digits(qty_str) or int(qty_str) < 1:
                         print("Enter a valid positive integer.")
                         continue
                     qty = int(qty_str)
@@ -293,73 +638,87 @@ class SessionHandler:
                 print("Invalid input. Enter y or n.")
 
     def select_product_details_menu(self, products):
+        # Products are listed a page at a time; only listed ones can be selected
+        remaining = iter(products)
+        shown = list(itertools.islice(remaining, PAGE_SIZE))
+        self.display_products(shown)
         while True:
-            select = input(
-                "Enter product number to view details or 0 to go back: ").strip()
+            if len(shown) < len(products):
+                select = prompt(
+                    "Enter product number to view details, n for the next page or 0 to go back: ").strip().lower()
+            else:
+                select = prompt(
+                    "Enter product number to view details or 0 to go back: ").strip()
             if select == "0":
                 break
+            if select == "n" and len(shown) < len(products):
+                page = list(itertools.islice(remaining, PAGE_SIZE))
+                self.display_products(page, start=len(shown) + 1)
+                shown.extend(page)
+                continue
             try:
                 idx = int(select) - 1
-                if idx < 0 or idx >= len(products):
+                if idx < 0 or idx >= len(shown):
                     raise IndexError
-                self.add_product_to_cart_menu(products[idx])
+                self.add_product_to_cart_menu(shown[idx])
             except (ValueError, IndexError):
                 print("Invalid selection.")
 
-    def view_products_menu(self):
+    def filter_by_category_menu(self):
+        category_choice = prompt("\n1. Computers\n"
+                                 "2. TVs\n"
+                                 "3. Audio\n"
+                                 "Select category (1-3): ").strip()
+        categories = {"1": "Computers", "2": "TVs", "3": "Audio"}
+        category = categories.get(category_choice)
+        if not category:
+            print("Invalid category choice.")
+            return
+        products = self.catalogue.filter_by_category(category)
+        if not products:
+            print(f"No products found in category: '{category}'.")
+            return
+        self.select_product_details_menu(products)
+
+    def filter_by_price_menu(self):
         while True:
-            print("\n1. Filter by Category")
-            print("2. Filter by Price Range")
-            print("3. Search by Product Name")
-            print("0. Back to Main Menu")
-            filter_choice = input("Choose option (0-3): ").strip()
-
-            if filter_choice == "1":
-                print("\n1. Computers")
-                print("2. TVs")
-                print("3. Audio")
-                category_choice = input("Select category (1-3): ").strip()
-                categories = {"1": "Computers", "2": "TVs", "3": "Audio"}
-                category = categories.get(category_choice)
-                if not category:
-                    print("Invalid category choice.")
-                    continue
-                products = self.catalogue.filter_by_category(category)
+            price_choice = prompt("\n1. Low to high\n"
+                                  "2. High to low\n"
+                                  "0. Back to Previous Menu\n"
+                                  "Select price sort option (0-2): ").strip()
+            if price_choice == "0":
+                break
+            elif price_choice in ("1", "2"):
+                ascending = price_choice == "1"
+                products = self.catalogue.filter_by_price(ascending)
                 if not products:
-                    print(f"No products found in category: '{category}'.")
+                    print("No products available.")
                     continue
-                self.display_products(products)
                 self.select_product_details_menu(products)
+            else:
+                print("Invalid choice.")
 
-            elif filter_choice == "2":
-                while True:
-                    print("\n1. Low to high")
-                    print("2. High to low")
-                    print("0. Back to Previous Menu")
-                    price_choice = input("Select price sort option (0-2): ").strip()
-                    if price_choice == "0":
-                        break
-                    elif price_choice in ("1", "2"):
-                        ascending = price_choice == "1"
-                        products = self.catalogue.filter_by_price(ascending)
-                        if not products:
-                            print("No products available.")
-                            continue
-                        self.display_products(products)
-                        self.select_product_details_menu(products)
-                    else:
-                        print("Invalid choice.")
+    def search_by_name_menu(self):
+        search_name = prompt("Enter product name to search: ").strip()
+        products = self.catalogue.search_by_name(search_name)
+        if not products:
+            print(f"No products found with name containing '{search_name}'.")
+            return
+        self.select_product_details_menu(products)
 
-            elif filter_choice == "3":
-                search_name = input("Enter product name to search: ").strip()
-                products = self.catalogue.search_by_name(search_name)
-                if not products:
-                    print(f"No products found with name containing '{search_name}'.")
-                    continue
-                self.display_products(products)
-                self.select_product_details_menu(products)
-            elif filter_choice == "0":
+    def view_products_menu(self):
+        handlers = {"1": self.filter_by_category_menu, "2": self.filter_by_price_menu, "3": self.search_by_name_menu}
+        while True:
+            filter_choice = prompt("\n1. Filter by Category\n"
+                                   "2. Filter by Price Range\n"
+                                   "3. Search by Product Name\n"
+                                   "0. Back to Main Menu\n"
+                                   "Choose option (0-3): ").strip()
+            if filter_choice == "0":
                 break
+            handler = handlers.get(filter_choice)
+            if handler:
+                handler()
             else:
                 print("Invalid choice.")
 
@@ -367,16 +726,16 @@ class SessionHandler:
         if not self.catalogue.products:
             print("Catalogue is empty.")
             return
-        self.display_products(self.catalogue.products)
-        upc = input("Enter the UPC of the product to delete: ").strip()
+        self.display_products(list(self.catalogue.products.values()))
+        upc = prompt("Enter the UPC of the product to delete: ").strip()
         product = self.catalogue.find_product_by_upc(upc)
         if not product:
             print("Product not found.")
             return
-        confirm = input(f"Are you sure you want to delete '{product.name}'? (y/n): ").strip().lower()
+        confirm = prompt(f"Are you sure you want to delete '{product.name}'? (y/n): ").strip().lower()
         if confirm == "y":
             self.catalogue.remove_product_by_upc(upc)
-            self.catalogue.save()
+            self.catalogue.record_remove(upc)
             print(f"Product '{product.name}' deleted from catalogue.")
         else:
             print("Deletion cancelled.")
@@ -386,34 +745,34 @@ class SessionHandler:
             self.cart.view_cart(self.catalogue)
             if not self.cart.items:
                 break
-            print("\n1. Remove item")
-            print("2. Update item quantity")
-            print("3. Checkout")
-            print("0. Back to main menu")
-            choice = input("Select an option: ").strip()
+            choice = prompt("\n1. Remove item\n"
+                            "2. Update item quantity\n"
+                            "3. Checkout\n"
+                            "0. Back to main menu\n"
+                            "Select an option: ").strip()
             if choice == "1":
-                remove_idx = input("Enter item number to remove: ").strip()
+                remove_idx = prompt("Enter item number to remove: ").strip()
                 try:
                     idx = int(remove_idx) - 1
                     if idx < 0 or idx >= len(self.cart.items):
                         raise IndexError
-                    upc_to_remove = list(self.cart.items.keys())[idx]
+                    upc_to_remove = self.cart.upc_at(idx)
                     self.cart.remove_from_cart(upc_to_remove)
                 except (ValueError, IndexError):
                     print("Invalid item number.")
             elif choice == "2":
-                update_idx = input("Enter item number to update quantity: ").strip()
+                update_idx = prompt("Enter item number to update quantity: ").strip()
                 try:
                     idx = int(update_idx) - 1
                     if idx < 0 or idx >= len(self.cart.items):
                         raise IndexError
-                    upc_to_update = list(self.cart.items.keys())[idx]
+                    upc_to_update = self.cart.upc_at(idx)
                     product = self.catalogue.find_product_by_upc(upc_to_update)
                     if not product:
                         print("Product not found.")
                         continue
-                    qty_str = input(f"Enter new quantity for {product.name} (0 to remove): ").strip()
-                    if not qty_str.isdigit():
+                    qty_str = prompt(f"Enter new quantity for {product.name} (0 to remove): ").strip()
+                    if not is_digits(qty_str):
                         print("Enter a valid integer quantity.")
                         continue
                     qty = int(qty_str)
@@ -422,8 +781,6 @@ class SessionHandler:
                     print("Invalid item number.")
             elif choice == "3":
                 if CheckoutHandler.checkout(self.cart, self.catalogue):
-                    self.catalogue.save()
-                    self.cart.save()
                     break
             elif choice == "0":
                 break
@@ -432,44 +789,44 @@ class SessionHandler:
 
     def add_new_product_menu(self):
         print("\n--- Add New Product ---")
-        upc = input("Enter UPC code: ").strip()
+        upc = prompt("Enter UPC code: ").strip()
         # Check if UPC already exists
-        if self.catalogue.find_product_by_upc(upc):
+        if upc in self.catalogue:
             print("Product with this UPC already exists.")
             return
-        if len(re.findall(r"[0-9]+", upc)[0]) != 12:
+        if not is_digits(upc, 12):
             print("The inputted UPC code must be a 12-digit number.")
             return
-        name = input("Enter product name: ").strip()
-        description = input("Enter product description: ").strip()
+        name = prompt("Enter product name: ").strip()
+        description = prompt("Enter product description: ").strip()
         while True:
             try:
-                price = float(input("Enter product price: ").strip())
-                if price < 0:
+                price = float(prompt("Enter product price: ").strip())
+                if not math.isfinite(price) or price < 0:
                     raise ValueError
                 break
             except ValueError:
                 print("Invalid price. Enter a positive number.")
-        category = input("Enter product category (Computers, TVs, Audio): ").strip()
+        category = prompt("Enter product category (Computers, TVs, Audio): ").strip()
         while True:
             try:
-                stock = int(input("Enter stock quantity: ").strip())
-                if stock < 0:
+                stock = int(prompt("Enter stock quantity: ").strip())
+                if not 0 <= stock <= MAX_STOCK:
                     raise ValueError
                 break
             except ValueError:
                 print("Invalid stock. Enter a non-negative integer.")
         new_product = Product(upc, name, description, price, category, stock)
         self.catalogue.add_product(new_product)
-        self.catalogue.save()
+        self.catalogue.record_add(new_product)
         print(f"Product '{name}' added successfully!")
 
     def edit_product_stock_menu(self):
         if not self.catalogue.products:
             print("Catalogue is empty.")
             return
-        self.display_products(self.catalogue.products)
-        upc = input("Enter the UPC of the product to edit stock: ").strip()
+        self.display_products(list(self.catalogue.products.values()))
+        upc = prompt("Enter the UPC of the product to edit stock: ").strip()
         product = self.catalogue.find_product_by_upc(upc)
         if not product:
             print("Product not found.")
@@ -477,88 +834,82 @@ class SessionHandler:
         print(f"Current stock for {product.name}: {product.stock}")
         while True:
             try:
-                new_stock = int(input("Enter new stock quantity: ").strip())
-                if new_stock < 0:
+                new_stock = int(prompt("Enter new stock quantity: ").strip())
+                if not 0 <= new_stock <= MAX_STOCK:
                     raise ValueError
                 break
             except ValueError:
                 print("Invalid stock quantity. Enter a non-negative integer.")
-        product.stock = new_stock
-        self.catalogue.save()
+        product.set_stock(new_stock)
+        self.catalogue.record_stock(product)
         print(f"Stock updated for {product.name} to {new_stock}.")
 
     def delete_product_menu(self):
         if not self.catalogue.products:
             print("Catalogue is empty.")
             return
-        self.display_products(self.catalogue.products)
-        upc = input("Enter the UPC of the product to delete: ").strip()
+        self.display_products(list(self.catalogue.products.values()))
+        upc = prompt("Enter the UPC of the product to delete: ").strip()
         product = self.catalogue.find_product_by_upc(upc)
         if not product:
             print("Product not found.")
             return
-        confirm = input(f"Are you sure you want to delete '{product.name}'? (y/n): ").strip().lower()
+        confirm = prompt(f"Are you sure you want to delete '{product.name}'? (y/n): ").strip().lower()
         if confirm == "y":
             self.catalogue.remove_product_by_upc(upc)
-            self.catalogue.save()
+            self.catalogue.record_remove(upc)
             print(f"Product '{product.name}' deleted from catalogue.")
         else:
             print("Deletion cancelled.")
 
     def manage_catalogue_menu(self):
-        while True:
-            print("\n--- Manage Catalogue ---")
-            print("1. Edit product stock")
-            print("2. Delete product from catalogue")
-            print("3. Return to main menu")
-            choice = input("Enter your choice (1-3): ").strip()
-            if choice == "1":
-                self.edit_product_stock_menu()
-            elif choice == "2":
-                self.delete_product_menu()
-            elif choice == "3":
-                break
-            else:
-                print("Invalid choice. Try again.")
+        handlers = {"1": self.edit_product_stock_menu, "2": self.delete_product_menu}
+        with self.catalogue.batch():
+            while True:
+                choice = prompt("\n--- Manage Catalogue ---\n"
+                                "1. Edit product stock\n"
+                                "2. Delete product from catalogue\n"
+                                "3. Return to main menu\n"
+                                "Enter your choice (1-3): ").strip()
+                if choice == "3":
+                    break
+                handler = handlers.get(choice)
+                if handler:
+                    handler()
+                else:
+                    print("Invalid choice. Try again.")
 
     def main_menu(self):
+        handlers = {"1": self.view_products_menu, "2": self.cart_menu, "3": self.add_new_product_menu,
+                    "4": self.manage_catalogue_menu}
         while True:
-            print("\n--- Welcome to AWE Electronics Catalogue ---")
-            print("1. View All Products")
-            print("2. View Cart")
-            print("3. Add New Product")
-            print("4. Manage Catalogue")
-            print("5. Save & Exit")
-            main_choice = input("Enter your choice (1-5): ").strip()
-
-            if main_choice == "1":
-                self.view_products_menu()
-
-            elif main_choice == "2":
-                self.cart_menu()
-
-            elif main_choice == "3":
-                self.add_new_product_menu()
-
-            elif main_choice == "4":
-                self.manage_catalogue_menu()
-
-            elif main_choice == "5":
+            main_choice = prompt("\n--- Welcome to AWE Electronics Catalogue ---\n"
+                                 "1. View All Products\n"
+                                 "2. View Cart\n"
+                                 "3. Add New Product\n"
+                                 "4. Manage Catalogue\n"
+                                 "5. Save & Exit\n"
+                                 "Enter your choice (1-5): ").strip()
+
+            if main_choice == "5":
                 print("Saving data and exiting...")
-                self.catalogue.save()
-                self.cart.save()
+                if self._catalogue is not None:
+                    self._catalogue.save_if_changed()
+                self.cart.save_if_changed()
                 return
-
+            handler = handlers.get(main_choice)
+            if handler:
+                handler()
             else:
                 print("Invalid choice. Try again.")
 
     def login_menu(self):
         while True:
-            print("\nWelcome to AWE Electronics!")
-            print("1. Login")
-            print("2. Signup")
-            print("3. Exit")
-            choice = input("Select an option: ").strip()
+            choice = prompt("\nWelcome to AWE Electronics!\n"
+                            "1. Login\n"
+                            "2. Signup\n"
+                            "3. Exit\n"
+                            "Select an option: ").strip()
 
             if choice == "1":
                 user = self.login()
@@ -569,6 +920,8 @@ class SessionHandler:
             elif choice == "2":
                 self.signup()
             elif choice == "3":
+                if self.users_journal.count:
+                    self.save_users()
                 print("Goodbye!")
                 break
             else:
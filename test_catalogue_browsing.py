@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+import catalogue_browsing as cb
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_append_after_torn_record_is_replayed(self):
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        laptop = catalogue.find_product_by_upc("000000001111")
+        laptop.set_stock(1)
+        catalogue.record_stock(laptop)
+        catalogue.journal.file.close()
+        with open(cb.CATALOGUE_LOG, "ab") as f:
+            f.write(b'{"op":"stock","upc":"0000000')
+
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        laptop = catalogue.find_product_by_upc("000000001111")
+        self.assertEqual(laptop.stock, 1)
+        laptop.set_stock(42)
+        catalogue.record_stock(laptop)
+        catalogue.journal.file.close()
+
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        self.assertEqual(catalogue.find_product_by_upc("000000001111").stock, 42)
+        self.assertEqual(catalogue.journal.count, 2)
+
+    def test_replay_stops_at_unusable_record(self):
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        with open(cb.CATALOGUE_LOG, "ab") as f:
+            f.write(b'{"op":"add","product":{"upc":"666666666666","name":"W","description":"d",'
+                    b'"price":null,"category":"Audio","stock":1}}\n[1,2]\n')
+
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        self.assertNotIn("666666666666", catalogue)
+        laptop = catalogue.find_product_by_upc("000000001111")
+        laptop.set_stock(42)
+        catalogue.record_stock(laptop)
+        catalogue.journal.file.close()
+
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        self.assertEqual(catalogue.find_product_by_upc("000000001111").stock, 42)
+        self.assertEqual(catalogue.journal.count, 1)
+
+    def test_invalid_utf8_without_orjson(self):
+        orjson, cb.orjson = cb.orjson, None
+        self.addCleanup(setattr, cb, "orjson", orjson)
+        with open(cb.CART_FILE, "wb") as f:
+            f.write(b'{"000000001111":\xe2\x82')
+        with open(cb.CART_LOG, "wb") as f:
+            f.write(b'{"op":"set","upc":"000000003333","qty":2}\n{"op":"set","upc":"\xe2\x82\n')
+        cart = cb.Cart()
+        cart.load()
+        self.assertEqual(cart.items, {"000000003333": 2})
+
+    def test_checkout_with_only_removed_products(self):
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        cart = cb.Cart()
+        cart.add_to_cart(catalogue.find_product_by_upc("000000003333"), 2)
+        catalogue.remove_product_by_upc("000000003333")
+        prompt, cb.prompt = cb.prompt, None  # payment details must not be asked for
+        self.addCleanup(setattr, cb, "prompt", prompt)
+        self.assertFalse(cb.CheckoutHandler.checkout(cart, catalogue))
+        self.assertEqual(cart.items, {"000000003333": 2})
+
+    def test_journal_replayed_when_catalogue_file_missing(self):
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        speaker = catalogue.find_product_by_upc("000000003333")
+        speaker.set_stock(3)
+        catalogue.record_stock(speaker)
+        catalogue.journal.file.close()
+        if os.path.exists(cb.CATALOGUE_FILE):
+            os.remove(cb.CATALOGUE_FILE)
+
+        catalogue = cb.ProductCatalogue()
+        catalogue.load()
+        self.assertEqual(catalogue.find_product_by_upc("000000003333").stock, 3)
+        self.assertTrue(os.path.exists(cb.CATALOGUE_LOG))
+
+    def test_json_dumps_encodes_integers_orjson_rejects(self):
+        self.assertEqual(cb.json_dumps({"stock": 10 ** 30}), b'{"stock":1000000000000000000000000000000}')
+
+
+if __name__ == "__main__":
+    unittest.main()